@@ -3,6 +3,57 @@ from tkinter import filedialog, messagebox, colorchooser, ttk
 from PIL import Image, ImageTk, ImageDraw
 import os
 import math
+import queue
+import stat
+import tempfile
+import threading
+import zlib
+
+# zlib strategies offered for PNG export, keyed by the label shown in the UI.
+# "Default" leaves the choice to Pillow, which also picks the PNG row filters.
+PNG_COMPRESS_STRATEGIES = {
+    "Default": None,
+    "Filtered": zlib.Z_FILTERED,
+    "Huffman Only": zlib.Z_HUFFMAN_ONLY,
+    "Run-Length (RLE)": zlib.Z_RLE,
+    "Fixed": zlib.Z_FIXED,
+}
+
+# Formats whose Pillow writers only need write(), so they can be cancelled mid-encode
+STREAMING_FORMATS = ("PNG", "JPEG", "WEBP")
+
+class SaveCancelled(Exception):
+    """Raised inside the save worker when the user cancels a save"""
+
+class CancellableWriter:
+    """File wrapper that reports bytes written and aborts the encoder on cancel
+
+    Pillow writes encoded data chunk by chunk through write(), so raising here
+    stops PNG and streaming JPEG encoders part way through. fileno() is left out
+    on purpose: Pillow would otherwise encode straight to the file descriptor.
+    """
+    def __init__(self, fp, cancel_event, progress_callback):
+        self.fp = fp
+        self.cancel_event = cancel_event
+        self.progress_callback = progress_callback
+        self.bytes_written = 0
+
+    def write(self, data):
+        if self.cancel_event.is_set():
+            raise SaveCancelled()
+        written = self.fp.write(data)
+        self.bytes_written += len(data)
+        self.progress_callback(self.bytes_written)
+        return written
+
+    def flush(self):
+        self.fp.flush()
+
+    def tell(self):
+        return self.fp.tell()
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        return self.fp.seek(offset, whence)
 
 class RoundedButton(tk.Canvas):
     """Custom rounded button widget"""
@@ -185,13 +236,45 @@ class ModernGridTool:
         self.panning = False
         self.pan_start_x = 0
         self.pan_start_y = 0
+
+        # Encoder settings used when saving (defaults match Pillow's own)
+        self.png_compress_level = tk.IntVar(value=6)
+        self.png_compress_strategy = tk.StringVar(value="Default")
+        self.jpeg_quality = tk.IntVar(value=75)
+        self.jpeg_optimize = tk.BooleanVar(value=False)
+        self.jpeg_progressive = tk.BooleanVar(value=False)
+        self.webp_quality = tk.IntVar(value=80)
+        self.webp_method = tk.IntVar(value=4)
+        self.webp_lossless = tk.BooleanVar(value=False)
+        self.export_window = None
+
+        # Background save state
+        self.saving = False
+        self.save_cancel = None
+        self.save_progress_var = tk.DoubleVar(value=0)
    
         self.create_main_layout()
   
+        status_frame = tk.Frame(root, bg="#e0e0e0")
+        status_frame.pack(side=tk.BOTTOM, fill=tk.X)
+
         self.status_var = tk.StringVar(value="Ready to start. Click 'Open Image' to begin.")
-        self.status_bar = tk.Label(root, textvariable=self.status_var, bg="#e0e0e0", fg="#555555", 
+        self.status_bar = tk.Label(status_frame, textvariable=self.status_var, bg="#e0e0e0", fg="#555555", 
                                 relief=tk.FLAT, anchor=tk.W, padx=10, pady=5)
-        self.status_bar.pack(side=tk.BOTTOM, fill=tk.X)
+        self.status_bar.pack(side=tk.LEFT, fill=tk.X, expand=True)
+
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+
+        # Shown only while a save is running
+        self.save_progress_frame = tk.Frame(status_frame, bg="#e0e0e0")
+
+        self.save_progress = ttk.Progressbar(self.save_progress_frame, orient=tk.HORIZONTAL, length=200,
+                                           mode="determinate", maximum=100, variable=self.save_progress_var)
+        self.save_progress.pack(side=tk.LEFT, padx=(0, 10))
+
+        cancel_save_btn = RoundedButton(self.save_progress_frame, text="Cancel", command=self.cancel_save,
+                                     bg="#e0e0e0", fg="#555555", radius=8, width=60, height=24, font_size=10)
+        cancel_save_btn.pack(side=tk.LEFT, padx=(0, 10))
         
     def create_main_layout(self):
         main_container = tk.Frame(self.root, bg="#f0f0f0")
@@ -207,6 +290,10 @@ class ModernGridTool:
         save_btn = RoundedButton(toolbar, text="Save Image", command=self.save_image, 
                               bg="#4CAF50", fg="white", radius=10, width=120, height=35)
         save_btn.pack(side=tk.LEFT, padx=(0, 10))
+
+        save_options_btn = RoundedButton(toolbar, text="Save Options", command=self.show_export_options, 
+                                      bg="#e0e0e0", fg="#333333", radius=10, width=120, height=35)
+        save_options_btn.pack(side=tk.LEFT, padx=(0, 10))
         
         reset_btn = RoundedButton(toolbar, text="Reset All", command=self.reset_all, 
                                bg="#e0e0e0", fg="#333333", radius=10, width=120, height=35)
@@ -355,8 +442,20 @@ class ModernGridTool:
         self.canvas.create_text(300, 200, text="Open an image to begin", 
                            font=("Arial", 14), fill="#CCCCCC")
     
+    def on_close(self):
+        """Close the window unless a save is still running"""
+        if self.saving:
+            messagebox.showwarning("Warning", "An image is still being saved.\nWait for it to finish or cancel it first.")
+            return
+
+        self.root.destroy()
+
     def go_to_start_page(self):
         """Return to the start page"""
+        if self.saving:
+            messagebox.showwarning("Warning", "An image is still being saved.\nWait for it to finish or cancel it first.")
+            return
+
         if self.original_image is not None:
             if not messagebox.askyesno("Confirm", "Are you sure you want to return to the start page?\nAny unsaved changes will be lost."):
                 return
@@ -547,38 +646,47 @@ class ModernGridTool:
 
         self.show_image_on_canvas()
         
-    def apply_grid(self, image):
-        """Apply grid to the image"""
+    def get_grid_settings(self):
+        """Snapshot the current grid settings so they can be used off the Tk thread"""
+        return {
+            "cells": self.grid_count.get(),
+            "thickness": self.grid_thickness.get(),
+            "color": self.grid_color,
+            "square": self.use_square_cells.get(),
+        }
+
+    def apply_grid(self, image, settings=None, progress_callback=None):
+        """Apply grid to the image, calling progress_callback(done, total) after each line"""
+        if settings is None:
+            settings = self.get_grid_settings()
+
         result = image.copy()
         draw = ImageDraw.Draw(result)
 
         width, height = result.size
-        cells = self.grid_count.get()
-        thickness = self.grid_thickness.get()
+        cells = settings["cells"]
+        thickness = settings["thickness"]
 
-        if self.use_square_cells.get():
+        if settings["square"]:
             cell_size = min(width, height) / cells
             num_cells_x = math.ceil(width / cell_size)
             num_cells_y = math.ceil(height / cell_size)
 
-            for i in range(num_cells_x + 1):
-                x = i * cell_size
-                draw.line([(x, 0), (x, height)], fill=self.grid_color, width=thickness)
-
-            for j in range(num_cells_y + 1):
-                y = j * cell_size
-                draw.line([(0, y), (width, y)], fill=self.grid_color, width=thickness)
+            xs = [i * cell_size for i in range(num_cells_x + 1)]
+            ys = [j * cell_size for j in range(num_cells_y + 1)]
         else:
             cell_width = width / cells
             cell_height = height / cells
 
-            for i in range(cells + 1):
-                x = i * cell_width
-                draw.line([(x, 0), (x, height)], fill=self.grid_color, width=thickness)
+            xs = [i * cell_width for i in range(cells + 1)]
+            ys = [j * cell_height for j in range(cells + 1)]
+
+        lines = [[(x, 0), (x, height)] for x in xs] + [[(0, y), (width, y)] for y in ys]
 
-            for j in range(cells + 1):
-                y = j * cell_height
-                draw.line([(0, y), (width, y)], fill=self.grid_color, width=thickness)
+        for index, line in enumerate(lines, start=1):
+            draw.line(line, fill=settings["color"], width=thickness)
+            if progress_callback:
+                progress_callback(index, len(lines))
 
         return result
 
@@ -636,27 +744,268 @@ class ModernGridTool:
         self.update_preview()
         self.status_var.set("Changes applied successfully!")
 
+    def create_option_slider(self, parent, text, variable, from_, to):
+        """Create a labelled slider with a value readout"""
+        tk.Label(parent, text=text, bg="white", fg="#555555", 
+               anchor=tk.W).pack(fill=tk.X, pady=(10, 5))
+
+        value_label = tk.Label(parent, text=str(variable.get()), bg="white", fg="#555555")
+
+        slider = ttk.Scale(parent, from_=from_, to=to, orient=tk.HORIZONTAL, variable=variable,
+                         command=lambda value: value_label.config(text=str(int(float(value)))))
+        slider.pack(fill=tk.X)
+        value_label.pack(anchor=tk.E)
+
+    def show_export_options(self):
+        """Show the encoder settings used when saving"""
+        if self.export_window is not None and self.export_window.winfo_exists():
+            self.export_window.lift()
+            return
+
+        window = tk.Toplevel(self.root, bg="white")
+        window.title("Save Options")
+        window.resizable(False, False)
+        window.transient(self.root)
+        self.export_window = window
+
+        tk.Label(window, text="SAVE OPTIONS", bg="white", fg="#555555", 
+               anchor=tk.W, padx=15, pady=10).pack(fill=tk.X)
+
+        notebook = ttk.Notebook(window)
+        notebook.pack(fill=tk.BOTH, expand=True, padx=15)
+
+        png_tab = tk.Frame(notebook, bg="white", padx=15, pady=10)
+        notebook.add(png_tab, text="PNG")
+
+        self.create_option_slider(png_tab, "Compression Level", self.png_compress_level, 0, 9)
+
+        tk.Label(png_tab, text="Compression Strategy", bg="white", fg="#555555", 
+               anchor=tk.W).pack(fill=tk.X, pady=(10, 5))
+        ttk.Combobox(png_tab, textvariable=self.png_compress_strategy, values=list(PNG_COMPRESS_STRATEGIES),
+                   state="readonly").pack(fill=tk.X)
+
+        tk.Label(png_tab, text="Lower levels save faster, higher levels give smaller files", 
+               bg="white", fg="#999999", anchor=tk.W).pack(fill=tk.X, pady=(15, 0))
+
+        jpeg_tab = tk.Frame(notebook, bg="white", padx=15, pady=10)
+        notebook.add(jpeg_tab, text="JPEG")
+
+        self.create_option_slider(jpeg_tab, "Quality", self.jpeg_quality, 1, 95)
+
+        ttk.Checkbutton(jpeg_tab, text="Optimize Huffman Tables", 
+                      variable=self.jpeg_optimize).pack(fill=tk.X, pady=(10, 0))
+        ttk.Checkbutton(jpeg_tab, text="Progressive", 
+                      variable=self.jpeg_progressive).pack(fill=tk.X, pady=(5, 0))
+
+        tk.Label(jpeg_tab, text="Transparency is dropped when saving as JPEG", 
+               bg="white", fg="#999999", anchor=tk.W).pack(fill=tk.X, pady=(15, 0))
+
+        webp_tab = tk.Frame(notebook, bg="white", padx=15, pady=10)
+        notebook.add(webp_tab, text="WebP")
+
+        self.create_option_slider(webp_tab, "Quality", self.webp_quality, 0, 100)
+        self.create_option_slider(webp_tab, "Encoding Effort", self.webp_method, 0, 6)
+
+        ttk.Checkbutton(webp_tab, text="Lossless", 
+                      variable=self.webp_lossless).pack(fill=tk.X, pady=(10, 0))
+
+        tk.Label(webp_tab, text="Lower effort saves faster, higher effort gives smaller files", 
+               bg="white", fg="#999999", anchor=tk.W).pack(fill=tk.X, pady=(15, 0))
+
+        close_btn = RoundedButton(window, text="Close", command=window.destroy,
+                               bg="#4CAF50", fg="white", radius=10, width=120, height=35)
+        close_btn.pack(pady=15)
+
+    def get_save_options(self, image_format):
+        """Return the Pillow encoder options for the given format"""
+        if image_format == "PNG":
+            options = {"compress_level": self.png_compress_level.get()}
+            strategy = PNG_COMPRESS_STRATEGIES[self.png_compress_strategy.get()]
+            if strategy is not None:
+                options["compress_type"] = strategy
+            return options
+        if image_format == "JPEG":
+            return {
+                "quality": self.jpeg_quality.get(),
+                "optimize": self.jpeg_optimize.get(),
+                "progressive": self.jpeg_progressive.get(),
+            }
+        if image_format == "WEBP":
+            return {
+                "quality": self.webp_quality.get(),
+                "method": self.webp_method.get(),
+                "lossless": self.webp_lossless.get(),
+            }
+        return {}
+
+    def prepare_image_for_format(self, image, image_format):
+        """Convert the image to a mode the target format can store"""
+        if image_format == "JPEG" and image.mode not in ("RGB", "L", "CMYK"):
+            return image.convert("RGB")
+        if image_format == "WEBP" and image.mode not in ("RGB", "RGBA"):
+            has_alpha = "A" in image.mode or "transparency" in image.info
+            return image.convert("RGBA" if has_alpha else "RGB")
+        return image
+
     def save_image(self):
-        """Save the processed image to a file"""
+        """Save the processed image to a file in the background"""
         if self.processed_image is None:
             messagebox.showwarning("Warning", "No image to save.")
             return
 
-        final_image = self.apply_grid(self.processed_image)
+        if self.saving:
+            messagebox.showinfo("Info", "An image is already being saved.")
+            return
 
-        file_types = [("PNG files", "*.png"), ("JPEG files", "*.jpg;*.jpeg"), ("All files", "*.*")]
+        file_types = [("PNG files", "*.png"), ("JPEG files", "*.jpg;*.jpeg"), ("WebP files", "*.webp"), 
+                      ("All files", "*.*")]
 
         save_path = filedialog.asksaveasfilename(filetypes=file_types, defaultextension=".png", title="Save Image")
 
-        if save_path:
-            try:
-                final_image.save(save_path)
+        if not save_path:
+            return
 
-                file_name = os.path.basename(save_path)
-                self.status_var.set(f"Saved: {file_name}")
+        extension = os.path.splitext(save_path)[1].lower()
+        image_format = Image.registered_extensions().get(extension)
+        if image_format is None:
+            messagebox.showerror("Error", f"Unsupported file type: {extension or 'none'}")
+            return
 
-            except Exception as e:
-                messagebox.showerror("Error", f"Failed to save image: {str(e)}")
+        # Tk variables must only be read here, on the Tk thread
+        grid_settings = self.get_grid_settings()
+        save_options = self.get_save_options(image_format)
+
+        # Reading the umask briefly changes it for the whole process, so do it here
+        umask = os.umask(0)
+        os.umask(umask)
+
+        save_queue = queue.Queue()
+        self.save_cancel = threading.Event()
+        save_thread = threading.Thread(target=self.save_worker, daemon=True,
+                                       args=(self.processed_image, save_path, image_format,
+                                             grid_settings, save_options, umask, save_queue, self.save_cancel))
+
+        self.saving = True
+        self.save_progress.config(mode="determinate")
+        self.save_progress_var.set(0)
+        self.save_progress_frame.pack(side=tk.RIGHT)
+        self.status_var.set(f"Saving: {os.path.basename(save_path)}")
+
+        save_thread.start()
+        self.root.after(100, self.poll_save_progress, save_queue)
+
+    def save_worker(self, image, save_path, image_format, grid_settings, save_options, umask,
+                    save_queue, cancel_event):
+        """Draw the grid and encode the image; runs on a worker thread"""
+        def report_grid_progress(done, total):
+            if cancel_event.is_set():
+                raise SaveCancelled()
+            save_queue.put(("progress", done / total * 100, "Drawing grid..."))
+
+        def report_encode_progress(bytes_written):
+            save_queue.put(("encoding", f"Encoding {image_format}... {bytes_written / 1048576:.1f} MB written"))
+
+        temp_path = None
+        try:
+            final_image = self.apply_grid(image, grid_settings, report_grid_progress)
+            final_image = self.prepare_image_for_format(final_image, image_format)
+
+            if cancel_event.is_set():
+                raise SaveCancelled()
+            save_queue.put(("encoding", f"Encoding {image_format}..."))
+
+            # Stream into a temporary file next to the target and only replace the
+            # target once encoding succeeded, so an existing file is never truncated
+            with tempfile.NamedTemporaryFile(dir=os.path.dirname(save_path) or ".", suffix=".tmp",
+                                             delete=False) as temp_file:
+                temp_path = temp_file.name
+                if image_format in STREAMING_FORMATS:
+                    writer = CancellableWriter(temp_file, cancel_event, report_encode_progress)
+                    final_image.save(writer, format=image_format, **save_options)
+                else:
+                    # Writers such as PDF need a real file object
+                    final_image.save(temp_file, format=image_format, **save_options)
+
+            # WebP, optimized/progressive JPEG and non-streaming formats encode in
+            # a single call, so cancelling them only takes effect here
+            if cancel_event.is_set():
+                raise SaveCancelled()
+
+            self.copy_file_mode(save_path, temp_path, umask)
+            os.replace(temp_path, save_path)
+            temp_path = None
+
+            save_queue.put(("done", save_path))
+
+        except SaveCancelled:
+            save_queue.put(("cancelled",))
+        except Exception as e:
+            save_queue.put(("error", str(e)))
+        finally:
+            if temp_path is not None and os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def copy_file_mode(self, save_path, temp_path, umask):
+        """Give the temporary file the permissions a normally written file would have"""
+        if os.path.exists(save_path):
+            mode = stat.S_IMODE(os.stat(save_path).st_mode)
+        else:
+            # Temporary files are private (0600); fall back to 0666 minus the umask
+            mode = 0o666 & ~umask
+        os.chmod(temp_path, mode)
+
+    def poll_save_progress(self, save_queue):
+        """Apply progress messages posted by the save worker"""
+        try:
+            while True:
+                message = save_queue.get_nowait()
+                kind = message[0]
+
+                # Keep "Cancelling save..." visible until the worker stops
+                if kind in ("progress", "encoding") and self.save_cancel.is_set():
+                    continue
+
+                if kind == "progress":
+                    self.save_progress_var.set(message[1])
+                    self.status_var.set(message[2])
+                elif kind == "encoding":
+                    # The encoded size is unknown up front, so show activity and bytes written
+                    if str(self.save_progress.cget("mode")) != "indeterminate":
+                        self.save_progress.config(mode="indeterminate")
+                        self.save_progress.start(10)
+                    self.status_var.set(message[1])
+                else:
+                    self.finish_save(message)
+                    return
+        except queue.Empty:
+            pass
+
+        self.root.after(100, self.poll_save_progress, save_queue)
+
+    def finish_save(self, message):
+        """Hide the progress bar and report the result of a save"""
+        self.saving = False
+        self.save_progress.stop()
+        self.save_progress.config(mode="determinate")
+        self.save_progress_frame.pack_forget()
+
+        kind = message[0]
+        if kind == "done":
+            file_name = os.path.basename(message[1])
+            self.status_var.set(f"Saved: {file_name}")
+        elif kind == "cancelled":
+            self.status_var.set("Save cancelled")
+        else:
+            self.status_var.set("Save failed")
+            messagebox.showerror("Error", f"Failed to save image: {message[1]}")
+
+    def cancel_save(self):
+        """Ask the running save to stop"""
+        if not self.saving:
+            return
+
+        self.save_cancel.set()
+        self.status_var.set("Cancelling save...")
 
 def main():
     root = tk.Tk()